@@ -1,18 +1,24 @@
 # builtins
 import typing
 import csv
-import json
+import operator
 import datetime
+import decimal
+import os
+import time
 import argparse
 import sys
 import asyncio
 
 # 3rd-party
+import aiohttp
 import marshmallow
-import marshmallow.experimental.context
 import monarchmoney
+import msgspec
+import orjson
 import tenacity
 import gql
+import gql.transport.aiohttp
 import zoneinfo
 
 PORTFOLIO_HEADER = ["account", "ticker", "shares", "price", "cost"]
@@ -26,23 +32,92 @@ TRANSACTIONS_HEADER = [
     "amount",
 ]
 BALANCES_HEADER = ["account", "balance", "date_eastern", "datetime"]
+# row extractors in header order, built once; attrgetter returns the tuple in C
+BALANCE_ROW = operator.attrgetter(*BALANCES_HEADER)
+PORTFOLIO_ROW = operator.attrgetter(*PORTFOLIO_HEADER)
 RECORD_LIMIT_TX = 10000
+# concurrent in-flight transaction page queries; stay polite to the API
+TX_QUERY_CONCURRENCY = 8
 FN_TX_REPORT = "transactions.csv"
 FN_BALANCE_REPORT = "balance.csv"
 FN_BALANCE_HISTORY_REPORT = "balance_history.csv"
 FN_PORTFOLIO_REPORT = "portfolio.csv"
 RETRY_DELAY = 2
+# a re-login this recent (seconds) is fresh enough for a retrying request to reuse
+LOGIN_REFRESH_TTL = 5
+# one ZoneInfo for the whole run; constructing it per account re-probes tzdata
+EASTERN_TZ = zoneinfo.ZoneInfo("America/New_York")
+# a big explicit block buffer batches the report writes into few syscalls
+WRITE_BUFFER_SIZE = 1 << 20
+
+# just the holdings fields we actually consume; our schemas EXCLUDE the rest anyway.
+HOLDINGS_SELECTION = """
+  aggregateHoldings {
+    edges {
+      node {
+        id
+        quantity
+        basis
+        totalValue
+        security {
+          id
+          name
+          ticker
+          currentPrice
+        }
+      }
+    }
+  }
+"""
+
+
+class ORJSONResponse(aiohttp.ClientResponse):
+    """
+    aiohttp response that parses JSON with orjson instead of stdlib json.
+    The transactions response is the payload where the C parser pays off.
+    """
+
+    async def json(self, *args, **kwargs):
+        kwargs.setdefault("loads", orjson.loads)
+        return await super().json(*args, **kwargs)
+
+
+class ORJSONTransport(gql.transport.aiohttp.AIOHTTPTransport):
+    """
+    AIOHTTPTransport wired for orjson on both directions: requests are
+    serialized with orjson.dumps and responses parsed via ORJSONResponse.
+    """
 
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("json_serialize", lambda obj: orjson.dumps(obj).decode())
+        session_args = kwargs.setdefault("client_session_args", {})
+        session_args.setdefault("response_class", ORJSONResponse)
+        super().__init__(*args, **kwargs)
 
-# for tenacity
-def is_exception_401(exception):
-    return exception is not None and exception.code == 401
 
+# monarchmoney builds its own transport internally and offers no way to inject
+# one, so swap the symbol it resolves at call time. same spirit as the BASE_URL
+# patch we already maintain against that library.
+monarchmoney.monarchmoney.AIOHTTPTransport = ORJSONTransport
 
-# for tenacity
+
+# for tenacity. one flat predicate so each retry decision costs a single call.
+def is_retryable_401(exception):
+    return (
+        isinstance(exception, gql.transport.exceptions.TransportServerError)
+        and getattr(exception, "code", None) == 401
+    )
+
+
+# for tenacity. concurrent 401s (the gathered window fetches) all land here at
+# once; funnel them through the instance lock so a burst triggers one re-login,
+# and let retries arriving just after a refresh reuse it instead of stampeding.
 async def login_before_sleep(retry_state: tenacity.RetryCallState):
     instance = retry_state.args[0]
-    await instance.login(False)
+    async with instance._login_lock:
+        if time.monotonic() - instance._last_login_ts > LOGIN_REFRESH_TTL:
+            await instance.login(False)
+            instance._last_login_ts = time.monotonic()
 
 
 # for tenacity. we want the wait time configurable at the Monarch instance,
@@ -52,6 +127,19 @@ def wait_from_instance(retry_state: tenacity.RetryCallState):
     return instance.retry_delay
 
 
+# on a failed login, we need to ignore old auth session and make a new one.
+# the policy is identical for every query method, so build the decorator once
+# instead of re-evaluating the same tenacity expression per method at import.
+retry_on_401 = tenacity.retry(
+    retry=tenacity.retry_if_exception(is_retryable_401),
+    # force ignore old session on 401
+    before_sleep=login_before_sleep,
+    stop=tenacity.stop_after_attempt(2),
+    wait=wait_from_instance,
+    reraise=True,
+)
+
+
 class GroupSchema(marshmallow.Schema):
     id = marshmallow.fields.Int(required=True)
     name = marshmallow.fields.Str()
@@ -61,12 +149,10 @@ class GroupSchema(marshmallow.Schema):
         unknown = marshmallow.EXCLUDE
 
 
-class CategoryContext(typing.TypedDict):
-    catmap: typing.Dict[str, str]
-
-
 class CategorySchema(marshmallow.Schema):
-    id = marshmallow.fields.Int(required=True)
+    # the API sends ids as strings and transactions reference them as strings;
+    # keep them as-is so catmap keys need no re-stringifying
+    id = marshmallow.fields.Str(required=True)
     name = marshmallow.fields.Str()
     group = marshmallow.fields.Nested(GroupSchema)
 
@@ -85,30 +171,16 @@ class CategoryQuerySchema(marshmallow.Schema):
     @marshmallow.post_load
     def make_map(self, data, **kwargs):
         # make a map of category ids to group name
-        catmap = {}
-        for x in data["categories"]:
-            catmap[str(x["id"])] = x["group"]["name"]
-
-        return catmap
-
-
-class AccountSchema(marshmallow.Schema):
-    id = marshmallow.fields.Int(required=True)
-    displayName = marshmallow.fields.Str()
-    currentBalance = marshmallow.fields.Decimal(as_string=True)
-    holdingsCount = marshmallow.fields.Int()
-    updatedAt = marshmallow.fields.DateTime()
-
-    class Meta:
-        # Ignore unknown fields
-        unknown = marshmallow.EXCLUDE
+        return {x["id"]: x["group"]["name"] for x in data["categories"]}
 
 
 class SecuritySchema(marshmallow.Schema):
     id = marshmallow.fields.Int(required=True)
     name = marshmallow.fields.Str()
     ticker = marshmallow.fields.Str()
-    currentPrice = marshmallow.fields.Decimal(as_string=True)
+    # raw passthrough: the value only ever becomes a CSV string, so skip the
+    # Decimal round trip (context lookup + parse + re-str per field per row)
+    currentPrice = marshmallow.fields.Raw()
 
     class Meta:
         # Ignore unknown fields
@@ -117,9 +189,10 @@ class SecuritySchema(marshmallow.Schema):
 
 class AggregateHoldingSchema(marshmallow.Schema):
     id = marshmallow.fields.Int(required=True)
-    quantity = marshmallow.fields.Decimal(as_string=True)
-    basis = marshmallow.fields.Decimal(as_string=True)
-    totalValue = marshmallow.fields.Decimal(as_string=True)
+    # raw passthrough, same reasoning as SecuritySchema.currentPrice
+    quantity = marshmallow.fields.Raw()
+    basis = marshmallow.fields.Raw()
+    totalValue = marshmallow.fields.Raw()
     security = marshmallow.fields.Nested(SecuritySchema)
 
     class Meta:
@@ -169,120 +242,122 @@ class HoldingsQuerySchema(marshmallow.Schema):
         return [Holding(row) for row in data["portfolio"]["aggregateHoldings"]["edges"]]
 
 
-class MerchantSchema(marshmallow.Schema):
-    id = marshmallow.fields.Int(required=True)
-    name = marshmallow.fields.Str()
+# the transactions payload is the big one (RECORD_LIMIT_TX rows); decode it with
+# msgspec Structs instead of marshmallow so the per-row work happens in C rather
+# than a chain of Nested().load() calls. unknown fields are ignored by default.
+class TransactionMerchant(msgspec.Struct):
+    name: str
 
-    class Meta:
-        # Ignore unknown fields
-        unknown = marshmallow.EXCLUDE
-
-
-class CategorySchema(marshmallow.Schema):
-    id = marshmallow.fields.Int(required=True)
-    name = marshmallow.fields.Str()
-
-    class Meta:
-        # Ignore unknown fields
-        unknown = marshmallow.EXCLUDE
-
-
-class TransactionSchema(marshmallow.Schema):
-    id = marshmallow.fields.Int(required=True)
-    amount = marshmallow.fields.Decimal(as_string=True)
-    date = marshmallow.fields.Str()
-    notes = marshmallow.fields.Str(allow_none=True)
-    merchant = marshmallow.fields.Nested(MerchantSchema)
-    account = marshmallow.fields.Nested(AccountSchema)
-    category = marshmallow.fields.Nested(CategorySchema)
 
-    class Meta:
-        # Ignore unknown fields
-        unknown = marshmallow.EXCLUDE
+class TransactionCategory(msgspec.Struct):
+    # the API sends ids as strings; keep them that way, catmap is keyed by str
+    id: str
+    name: str
 
 
-class TransactionListSchema(marshmallow.Schema):
-    results = marshmallow.fields.List(marshmallow.fields.Nested(TransactionSchema))
+class TransactionAccount(msgspec.Struct):
+    displayName: str
 
-    class Meta:
-        # Ignore unknown fields
-        unknown = marshmallow.EXCLUDE
 
+class TransactionRecord(msgspec.Struct):
+    date: str
+    notes: typing.Optional[str]
+    # Decimal, not float, so the CSV renders "-5.21" and not a repr artifact
+    amount: decimal.Decimal
+    merchant: TransactionMerchant
+    category: TransactionCategory
+    account: TransactionAccount
 
-TransactionCategorySchemaContext = marshmallow.experimental.context.Context[
-    CategoryContext
-]
-
-
-class TransactionsQuerySchema(marshmallow.Schema):
-    allTransactions = marshmallow.fields.Nested(TransactionListSchema)
-
-    class Meta:
-        # Ignore unknown fields
-        unknown = marshmallow.EXCLUDE
 
-    @marshmallow.post_load
-    def make_csv_rows(self, data, **kwargs):
-        catmap = TransactionCategorySchemaContext.get()["catmap"]
-        return [Transaction(row, catmap) for row in data["allTransactions"]["results"]]
+class TransactionList(msgspec.Struct):
+    results: typing.List[TransactionRecord]
 
 
-class AccountsQuerySchema(marshmallow.Schema):
-    accounts = marshmallow.fields.List(marshmallow.fields.Nested(AccountSchema))
+class TransactionsQuery(msgspec.Struct):
+    allTransactions: TransactionList
 
-    class Meta:
-        # Ignore unknown fields
-        unknown = marshmallow.EXCLUDE
 
-    @marshmallow.post_load
-    def make_csv_rows(self, data, **kwargs):
-        return [Account(row) for row in data["accounts"]]
+# building a Schema() rebuilds its field map every time; these are stateless
+# across load() calls, so construct each exactly once and share.
+_CAT_SCHEMA = CategoryQuerySchema()
+_HOLD_SCHEMA = HoldingsQuerySchema()
 
 
 class Holding:
+    # thousands of these per portfolio; slots halve the per-instance memory
+    __slots__ = ("account", "ticker", "shares", "price", "cost")
+
     def __init__(self, row):
         node = row["node"]
         self.account = (
             None  # held at higher level in the gql; don't read from input row.
         )
         self.ticker = node["security"]["ticker"]
-        # unclear why the as_string option doesn't get applied at read; apparently only does upon marshalling.
+        # str() of the raw JSON number renders the same digits the API sent
         self.shares = str(node["quantity"])
         self.price = str(node["security"]["currentPrice"])
         self.cost = str(node["basis"])
 
 
-class Transaction:
+def transaction_row(row, catmap):
     """
-    Used to flatten GQL-shaped Marshmallow into a flat object for CSV writing
+    Flatten one GQL-shaped TransactionRecord into a CSV row tuple, in
+    TRANSACTIONS_HEADER order.
     """
-
-    def __init__(self, row, catmap):
-        # row is a dict from a marshmallow transactionList.results
-        self.date = row["date"]
-        self.merchant = row["merchant"]["name"]
-        self.category = row["category"]["name"]
-        self.group = catmap[str(row["category"]["id"])]
-        self.account = row["account"]["displayName"]
-        self.notes = row["notes"]
-        self.amount = row["amount"]
+    return (
+        row.date,
+        row.merchant.name,
+        row.category.name,
+        catmap[row.category.id],
+        row.account.displayName,
+        row.notes,
+        row.amount,
+    )
 
 
 class Account:
+    __slots__ = ("id", "account", "balance", "holdingsCount", "datetime", "date_eastern")
+
     def __init__(self, row):
-        self.id = row["id"]
+        # row is a raw account dict straight from the GQL response; parse the
+        # two fields that actually need it inline.
+        self.id = int(row["id"])
         self.account = row["displayName"]
-        self.balance = row["currentBalance"]
+        # str of the raw JSON number; it only ever lands in a CSV cell anyway
+        self.balance = str(row["currentBalance"])
         self.holdingsCount = row["holdingsCount"]
-        self.datetime = row["updatedAt"].isoformat()
+        updated_at = datetime.datetime.fromisoformat(row["updatedAt"])
+        self.datetime = updated_at.isoformat()
 
         # convert to eastern timezone
-        self.date_eastern = (
-            row["updatedAt"]
-            .astimezone(zoneinfo.ZoneInfo("America/New_York"))
-            .date()
-            .isoformat()
-        )
+        self.date_eastern = updated_at.astimezone(EASTERN_TZ).date().isoformat()
+
+
+def month_windows(start, end):
+    """
+    Split the inclusive date range [start, end] into per-calendar-month
+    (start_date, end_date) isoformat pairs for windowed queries.
+    """
+    windows = []
+    current = start
+    while current <= end:
+        if current.month == 12:
+            next_month = datetime.date(current.year + 1, 1, 1)
+        else:
+            next_month = datetime.date(current.year, current.month + 1, 1)
+        window_end = min(end, next_month - datetime.timedelta(days=1))
+        windows.append((current.isoformat(), window_end.isoformat()))
+        current = next_month
+    return windows
+
+
+def load_accounts(accounts):
+    """
+    Flatten a raw accounts query dict into Account objects for CSV writing.
+    The consumer only reads five fields, so index the dicts directly rather
+    than running every account through a marshmallow Nested chain.
+    """
+    return [Account(row) for row in accounts["accounts"]]
 
 
 # TODO type hints on arguments and returns
@@ -314,6 +389,15 @@ class Monarch(object):
             self.mm = monarchmoney.MonarchMoney()
         pass
 
+    def _load_session_if_any(self):
+        # hydrate the client from a previously saved session without the full
+        # login() round: no credential flow, no awaiting. returns whether a
+        # session file was found and loaded.
+        if self.session_file and os.path.exists(self.session_file):
+            self.mm.load_session(self.session_file)
+            return True
+        return False
+
     # allow override session file location for unit test purposes. use their defualt, though.
     def __init__(
         self,
@@ -339,166 +423,210 @@ class Monarch(object):
         self.fn_portfolio_report = rp
         self.retry_delay = retry_delay
         self.session_file = session_file
+        # serialize 401-triggered re-logins; -inf so the first one always runs
+        self._login_lock = asyncio.Lock()
+        self._last_login_ts = float("-inf")
         self._init_mm()
 
-    def write_transactions(self, transactions):
-        with open(self.fn_tx_report, mode="w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(
-                f, fieldnames=TRANSACTIONS_HEADER, quoting=csv.QUOTE_ALL
-            )
-            writer.writeheader()
-            for tx in transactions:
-                writer.writerow(tx.__dict__)
-
-    # on a failed login, we need to ignore old auth session and make a new one.
-    @tenacity.retry(
-        retry=tenacity.retry_if_exception_type(
-            gql.transport.exceptions.TransportServerError
-        )
-        & tenacity.retry_if_exception(is_exception_401),
-        # force ignore old session on 401
-        before_sleep=login_before_sleep,
-        stop=tenacity.stop_after_attempt(2),
-        wait=wait_from_instance,
-        reraise=True,
-    )
+    # rows may be any iterable of row tuples, including a lazy generator; they
+    # are written as they are produced rather than materialized first.
+    def write_transactions(self, rows):
+        with open(
+            self.fn_tx_report,
+            mode="w",
+            newline="",
+            encoding="utf-8",
+            buffering=WRITE_BUFFER_SIZE,
+        ) as f:
+            # plain writer + tuples; DictWriter would rebuild a dict per row
+            writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+            writer.writerow(TRANSACTIONS_HEADER)
+            writer.writerows(rows)
+
+    @retry_on_401
     async def get_categories(self):
 
         # get category list
         return await self.mm.get_transaction_categories()
 
-    # on a failed login, we need to ignore old auth session and make a new one.
-    @tenacity.retry(
-        retry=tenacity.retry_if_exception_type(
-            gql.transport.exceptions.TransportServerError
-        )
-        & tenacity.retry_if_exception(is_exception_401),
-        # force ignore old session on 401
-        before_sleep=login_before_sleep,
-        stop=tenacity.stop_after_attempt(2),
-        wait=wait_from_instance,
-        reraise=True,
-    )
+    @retry_on_401
     async def get_transactions(self):
 
         # TODO we want the category group,
         # TODO we want the transaction tags
 
-        # get transactions dict
-        txs = await self.mm.get_transactions(
-            limit=RECORD_LIMIT_TX,
+        # fetch YTD as one window per month, concurrently; the server executes
+        # small windows faster and the round trips overlap. keep the full
+        # record limit per window so no month can silently truncate.
+        windows = month_windows(
             # we always want YTD
-            start_date=datetime.date(datetime.date.today().year, 1, 1).isoformat(),
-            end_date=datetime.date.today().isoformat(),
+            datetime.date(datetime.date.today().year, 1, 1),
+            datetime.date.today(),
         )
-        return txs
+        semaphore = asyncio.Semaphore(TX_QUERY_CONCURRENCY)
+
+        async def fetch_window(start_date, end_date):
+            async with semaphore:
+                return await self.mm.get_transactions(
+                    limit=RECORD_LIMIT_TX,
+                    start_date=start_date,
+                    end_date=end_date,
+                )
+
+        # return_exceptions so every window settles before we re-raise; a bare
+        # gather would leave the losing windows running into the retry attempt.
+        pages = await asyncio.gather(
+            *[fetch_window(s, e) for s, e in windows], return_exceptions=True
+        )
+        for page in pages:
+            if isinstance(page, BaseException):
+                raise page
+
+        # merge the pages back into the single-query response shape
+        results = []
+        total = 0
+        for page in pages:
+            results.extend(page["allTransactions"]["results"])
+            total += page["allTransactions"]["totalCount"]
+        return {"allTransactions": {"totalCount": total, "results": results}}
 
     async def report_transactions(self):
 
         cats = await self.get_categories()
-        cqs = CategoryQuerySchema()
-        catmap = cqs.load(cats)
+        catmap = _CAT_SCHEMA.load(cats)
 
         txs = await self.get_transactions()
 
-        # # init schema object instance from dict
-        schema = TransactionsQuerySchema()
-        with TransactionCategorySchemaContext({"catmap": catmap}):
-            loaded_data = schema.load(txs)
+        # mm already parsed the response to dicts, so convert rather than decode bytes
+        query = msgspec.convert(txs, type=TransactionsQuery)
+
+        # generator, not a list: rows flow straight into the csv writer so peak
+        # memory stays flat no matter how close we get to RECORD_LIMIT_TX
+        rows = (transaction_row(row, catmap) for row in query.allTransactions.results)
 
-        # format and write as csv
-        self.write_transactions(loaded_data)
+        # format and write as csv. in a worker thread so the event loop keeps
+        # servicing whatever GQL calls are still in flight.
+        await asyncio.to_thread(self.write_transactions, rows)
         return
 
     def write_balances(self, accounts):
 
-        with open(self.fn_balance_report, mode="w", newline="", encoding="utf-8") as f:
-            # ignore arg will ignore keys not in the header; Account object has extra holdings info not wanted in
-            # the output.
-            writer = csv.DictWriter(
-                f,
-                fieldnames=BALANCES_HEADER,
-                quoting=csv.QUOTE_ALL,
-                extrasaction="ignore",
-            )
-            writer.writeheader()
-            for s in accounts:
-                writer.writerow(s.__dict__)
+        with open(
+            self.fn_balance_report,
+            mode="w",
+            newline="",
+            encoding="utf-8",
+            buffering=WRITE_BUFFER_SIZE,
+        ) as f:
+            # pull just the header fields; Account carries extra holdings info
+            # not wanted in the output.
+            writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+            writer.writerow(BALANCES_HEADER)
+            writer.writerows(map(BALANCE_ROW, accounts))
 
     def write_balances_history(self, accounts):
 
+        # decide on the header with one stat before opening; tell() on the
+        # append handle costs a syscall per run and confuses large buffering.
+        need_header = (
+            not os.path.exists(self.fn_balance_history_report)
+            or os.path.getsize(self.fn_balance_history_report) == 0
+        )
         with open(
-            self.fn_balance_history_report, mode="a", newline="", encoding="utf-8"
+            self.fn_balance_history_report,
+            mode="a",
+            newline="",
+            encoding="utf-8",
+            buffering=WRITE_BUFFER_SIZE,
         ) as f:
-            # ignore arg will ignore keys not in the header; Account object has extra holdings info not wanted in
-            # the output.
-            writer = csv.DictWriter(
-                f,
-                fieldnames=BALANCES_HEADER,
-                quoting=csv.QUOTE_ALL,
-                extrasaction="ignore",
-            )
-            # If the file pointer is at the start, file is empty or was new and it's safe to write a header.
-            # otherwise assume file exists already with content and a header.
-            if f.tell() == 0:
-                writer.writeheader()
-            for s in accounts:
-                writer.writerow(s.__dict__)
+            # pull just the header fields; Account carries extra holdings info
+            # not wanted in the output.
+            writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+            # an empty or absent file gets a header; otherwise assume the
+            # existing content already starts with one.
+            if need_header:
+                writer.writerow(BALANCES_HEADER)
+            writer.writerows(map(BALANCE_ROW, accounts))
 
     async def report_balances(self):
         accounts = await self.get_accounts()
 
-        # # init schema object instance from dict
-        schema = AccountsQuerySchema()
-        loaded_data = schema.load(accounts)
+        loaded_data = load_accounts(accounts)
 
-        # format and write as csv
-        self.write_balances(loaded_data)
-        self.write_balances_history(loaded_data)
+        # format and write as csv, off the event loop thread
+        await asyncio.to_thread(self.write_balances, loaded_data)
+        await asyncio.to_thread(self.write_balances_history, loaded_data)
 
         # portfolio needs subset of this info, don't query it again
         return loaded_data
 
-    @tenacity.retry(
-        retry=tenacity.retry_if_exception_type(
-            gql.transport.exceptions.TransportServerError
-        )
-        & tenacity.retry_if_exception(is_exception_401),
-        # force ignore old session on 401
-        before_sleep=login_before_sleep,
-        stop=tenacity.stop_after_attempt(2),
-        wait=wait_from_instance,
-        reraise=True,
-    )
+    @retry_on_401
     async def get_accounts(self):
         return await self.mm.get_accounts()
 
-    @tenacity.retry(
-        retry=tenacity.retry_if_exception_type(
-            gql.transport.exceptions.TransportServerError
-        )
-        & tenacity.retry_if_exception(is_exception_401),
-        # force ignore old session on 401
-        before_sleep=login_before_sleep,
-        stop=tenacity.stop_after_attempt(2),
-        wait=wait_from_instance,
-        reraise=True,
-    )
+    @retry_on_401
     async def get_holdings(self, account_id):
         return await self.mm.get_account_holdings(account_id)
 
+    @retry_on_401
+    async def get_holdings_batch(self, account_ids):
+        """
+        Fetch holdings for many accounts in one HTTP+GQL round trip by aliasing
+        one portfolio() selection per account. monarchmoney only offers the
+        one-account-per-call form, so drop down to its gql_call directly.
+        Returns a map of account id -> dict shaped like a single get_holdings result.
+        """
+        if not account_ids:
+            return {}
+
+        today = datetime.date.today().isoformat()
+        selections = []
+        variables = {}
+        for i, account_id in enumerate(account_ids):
+            selections.append(
+                "gatsby%d_portfolio: portfolio(input: $input_%d) { %s }"
+                % (i, i, HOLDINGS_SELECTION)
+            )
+            variables["input_%d" % i] = {
+                "accountIds": [str(account_id)],
+                "endDate": today,
+                "includeHiddenHoldings": True,
+                "startDate": today,
+            }
+
+        variable_defs = ", ".join(
+            "$input_%d: PortfolioInput" % i for i in range(len(account_ids))
+        )
+        query = gql.gql(
+            "query Web_GetHoldingsBatch(%s) { %s }"
+            % (variable_defs, " ".join(selections))
+        )
+
+        result = await self.mm.gql_call(
+            operation="Web_GetHoldingsBatch",
+            graphql_query=query,
+            variables=variables,
+        )
+
+        # split the aliased response back out per account id
+        return {
+            account_id: {"portfolio": result["gatsby%d_portfolio" % i]}
+            for i, account_id in enumerate(account_ids)
+        }
+
     # assumes the account field is filled; we don't get that inside the individual holding object, we have to
     # backfill it from the name of the account we used to initiate the holdings query
     def write_portfolio(self, holdings):
         with open(
-            self.fn_portfolio_report, mode="w", newline="", encoding="utf-8"
+            self.fn_portfolio_report,
+            mode="w",
+            newline="",
+            encoding="utf-8",
+            buffering=WRITE_BUFFER_SIZE,
         ) as f:
-            writer = csv.DictWriter(
-                f, fieldnames=PORTFOLIO_HEADER, quoting=csv.QUOTE_ALL
-            )
-            writer.writeheader()
-            for h in holdings:
-                writer.writerow(h.__dict__)
+            writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+            writer.writerow(PORTFOLIO_HEADER)
+            writer.writerows(map(PORTFOLIO_ROW, holdings))
         return
 
     # no retry on the toplevel, let the lower level queries retry themselves
@@ -509,18 +637,18 @@ class Monarch(object):
         # get a list of account names and IDs
         all_holdings = []
 
-        for account in accounts_query:
-            if int(account.holdingsCount) > 0:
-                # TODO underlying GQL would allow a list of IDs and fewer HTTP calls!
-                # in fact we could probably do the holdings filtering more directly too if we learn the query syntax.
-                holdings = await self.get_holdings(account.id)
-                hqs = HoldingsQuerySchema()
-                holdings_query = hqs.load(holdings)
-                for x in holdings_query:
-                    x.account = account.account
-                all_holdings.extend(holdings_query)
-
-        self.write_portfolio(all_holdings)
+        # one aliased GQL document covers every account, so the whole portfolio
+        # costs a single HTTP round trip no matter how many accounts hold positions.
+        accounts = [a for a in accounts_query if int(a.holdingsCount) > 0]
+        results = await self.get_holdings_batch([a.id for a in accounts])
+
+        for account in accounts:
+            holdings_query = _HOLD_SCHEMA.load(results[account.id])
+            for x in holdings_query:
+                x.account = account.account
+            all_holdings.extend(holdings_query)
+
+        await asyncio.to_thread(self.write_portfolio, all_holdings)
         return
 
 
@@ -600,10 +728,11 @@ async def main(argument_list):
     # if a valid but timed-out session is here,
     await m.login()
 
-    # create balances.csv
-    accounts_query = await m.report_balances()
-    # create transactions.csv
-    await m.report_transactions()
+    # create balances.csv and transactions.csv concurrently; they share no state.
+    # only the portfolio report needs the balances result, so it waits its turn.
+    accounts_query, _ = await asyncio.gather(
+        m.report_balances(), m.report_transactions()
+    )
     # create portfolio.csv
     await m.report_portfolio(accounts_query)
 
@@ -1,41 +1,60 @@
 import pytest
-import json
 import gql
 import monarchmoney
 import pytest_httpserver
+import werkzeug
+import os
 import pathlib
-import shutil
 import itertools
 import marshmallow
-import marshmallow.experimental.context
+import msgspec
+import orjson
 
 from monarch.monarch import *
 
 
-@pytest.fixture(scope="session", autouse=True)
+# opt-in rather than autouse: only the m fixture and the main() tests write
+# under out/, so pure load/convert tests skip the mkdir + cleanup entirely.
+@pytest.fixture(scope="session")
 def test_out():
     # wipe old output if exists
-    # create out dir
-    out = pathlib.Path("out")
-    out.mkdir(parents=False, exist_ok=True)
-
-    for item in itertools.chain(out.glob("*.csv"), out.glob("*.pickle")):
-        if item.is_file():
-            item.unlink()
+    # create out dir. under pytest-xdist (-n auto) each worker gets its own
+    # subdirectory so this session-scoped wipe can't race a sibling worker's
+    # freshly written outputs; without xdist the path stays plain "out".
+    out = pathlib.Path("out", os.environ.get("PYTEST_XDIST_WORKER", ""))
+    out.mkdir(parents=True, exist_ok=True)
+
+    # one scandir pass with a plain suffix check; two glob() walks built a
+    # Path object per entry and fnmatch'd the directory twice
+    with os.scandir(out) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith((".csv", ".pickle")):
+                os.unlink(entry.path)
 
     # let tests see the path. more convenient to not be a Path object so we can just append subpaths
-    yield "out"
+    yield str(out)
     # could wipe here but want the contents visible for inspection.
 
 
+# read the sample session out of data_examples exactly once per run; the
+# per-test fixture materializes these bytes with a single write, skipping
+# shutil.copy's open/stat/copystat chatter for every parametrized test.
+@pytest.fixture(scope="session")
+def session_pickle_bytes():
+    yield pathlib.Path("data_examples/mm_session.pickle").read_bytes()
+
+
+# stays function-scoped deliberately: monarchmoney mutates auth/session state
+# on the instance, so sharing one Monarch across tests would leak logins.
+# the expensive part (reading the sample session) is session-scoped above.
 @pytest.fixture()
-def m(request, test_out):
+def m(request, test_out, session_pickle_bytes):
     pickle_file = test_out + "/" + request.node.name + "_session.pickle"
     existing_session = request.param
     # want a literal boolean true; not just anything truthey
     if existing_session == True:
         # pre-create the session file with syntactically valid content.
-        shutil.copy("data_examples/mm_session.pickle", pickle_file)
+        pathlib.Path(pickle_file).write_bytes(session_pickle_bytes)
         pass
 
     m = Monarch(
@@ -53,6 +72,46 @@ def m(request, test_out):
     # no particular teardown
 
 
+# one shared instance per schema for the whole session; Schema() construction
+# rebuilds the field map, which the app code itself no longer repeats either.
+@pytest.fixture(scope="session")
+def cqs():
+    return CategoryQuerySchema()
+
+
+@pytest.fixture(scope="session")
+def hqs():
+    return HoldingsQuerySchema()
+
+
+# mocker.spy installs a MagicMock that deep-copies arguments and records a
+# _Call object per invocation; the retry tests only ever look at a count and
+# the most recent positional args, so a plain closure is enough.
+def count_calls(fn):
+    async def wrapper(*args, **kwargs):
+        wrapper.count += 1
+        wrapper.last_args = args
+        return await fn(*args, **kwargs)
+
+    wrapper.count = 0
+    wrapper.last_args = None
+    return wrapper
+
+
+# register one permanent matcher that walks a list of pre-serialized bodies,
+# instead of one RequestMatcher plus a respond_with_json dumps per canned
+# response. bodies are serialized once, here, at registration time.
+def cycle_responses(httpserver, url, bodies):
+    responses = iter(
+        [body if isinstance(body, bytes) else orjson.dumps(body) for body in bodies]
+    )
+    httpserver.expect_request(url).respond_with_handler(
+        lambda req: werkzeug.Response(
+            next(responses), content_type="application/json"
+        )
+    )
+
+
 # no constants available from underlying library. in fairness we're
 # exercising their internals rather than mocking them, an invasive and
 # potentially fragile approach but that helps ensure my own code
@@ -60,36 +119,104 @@ def m(request, test_out):
 MM_GRAPHQL_URL = "/graphql"
 MM_AUTH_URL = "/auth/login/"
 
+# canned login response; serialized once at import
+AUTH_RESP = orjson.dumps({"token": "FAKETOKEN"})
+
+# expected first data row of the balances outputs; a module-level tuple so the
+# value is built once and immutable rather than a per-test list.
+CHECKING_ROW = (
+    "Checking",
+    "1811.71",
+    "2026-01-12",
+    "2026-01-12T14:28:13.637497+00:00",
+)
 
-# don't need to read the file more than once but wonder if it's wise
-# to expose an object that might get modifeed and rely on it across
-# two functions
+
+# the session-scoped sample data is shared by every test; fail loudly if one
+# of them mutates it instead of silently corrupting whoever runs next.
+class FrozenDict(dict):
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("shared fixture data is read-only")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+
+class FrozenList(list):
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("shared fixture data is read-only")
+
+    __setitem__ = __delitem__ = __iadd__ = _readonly
+    append = extend = insert = pop = remove = sort = clear = _readonly
+
+
+def freeze(obj):
+    # recursively wrap plain dicts/lists; scalars are immutable already
+    if isinstance(obj, dict):
+        return FrozenDict((k, freeze(v)) for k, v in obj.items())
+    if isinstance(obj, list):
+        return FrozenList(freeze(v) for v in obj)
+    return obj
+
+
+# the old worry about exposing one object across tests is now enforced by
+# freeze() rather than left as a comment.
+# one memoizing loader instead of four copy-paste fixtures: the orjson parse
+# (kept in C for the big transactions sample) and the freeze() guard live in
+# exactly one place, and each file is still read at most once per session.
 @pytest.fixture(scope="session")
-def transaction_data():
-    with open("data_examples/transactions.json", "r") as f:
-        data = json.load(f)
-    yield data
+def json_data():
+    cache = {}
+
+    def load(name):
+        if name not in cache:
+            cache[name] = freeze(
+                orjson.loads(
+                    pathlib.Path("data_examples/%s.json" % name).read_bytes()
+                )
+            )
+        return cache[name]
+
+    return load
 
 
+# pre-serialized {"data": <sample>} bodies, one encode per file per session;
+# matchers and per-request handlers then hand out the same bytes instead of
+# re-running a JSON encode inside respond_with_json for every registration
+# (or, worse, inside a handler for every request).
 @pytest.fixture(scope="session")
-def category_data():
-    with open("data_examples/categories.json", "r") as f:
-        data = json.load(f)
-    yield data
+def gql_body(json_data):
+    cache = {}
 
+    def body(name):
+        if name not in cache:
+            cache[name] = orjson.dumps({"data": json_data(name)})
+        return cache[name]
 
+    return body
+
+
+# deserialized once per session; the raw-data fixtures above stay available for
+# tests that feed the mock server, these are for tests that only consume the
+# loaded objects and were each re-running schema.load / msgspec.convert.
 @pytest.fixture(scope="session")
-def accounts_data():
-    with open("data_examples/accounts.json", "r") as f:
-        data = json.load(f)
-    yield data
+def catmap(json_data, cqs):
+    return cqs.load(json_data("categories"))
 
 
 @pytest.fixture(scope="session")
-def holdings_data():
-    with open("data_examples/holdings.json", "r") as f:
-        data = json.load(f)
-    yield data
+def accounts_loaded(json_data):
+    return load_accounts(json_data("accounts"))
+
+
+@pytest.fixture(scope="session")
+def holdings_loaded(json_data, hqs):
+    return hqs.load(json_data("holdings"))
+
+
+@pytest.fixture(scope="session")
+def transactions_loaded(json_data):
+    return msgspec.convert(json_data("transactions"), type=TransactionsQuery)
 
 
 @pytest.fixture(scope="function")
@@ -104,36 +231,31 @@ def local_url(mocker, httpserver: pytest_httpserver.HTTPServer):
     pass
 
 
-def test_CategoryQuerySchema_load(category_data):
+def test_CategoryQuerySchema_load(catmap):
     # read categories from disk
-    # load it, check the map output
-    cqs = CategoryQuerySchema()
-    catmap = cqs.load(category_data)
+    # load it (in the session fixture), check the map output
     assert catmap["232525884431651171"] == "Home"
     assert len(catmap) == 80
 
 
-def test_convert_transactions(transaction_data, category_data):
-
-    cqs = CategoryQuerySchema()
-    catmap = cqs.load(category_data)
-    schema = TransactionsQuerySchema()
+def test_convert_transactions(transactions_loaded, catmap):
 
-    with TransactionCategorySchemaContext({"catmap": catmap}):
-        loaded_data = schema.load(transaction_data)
+    rows = [
+        transaction_row(row, catmap)
+        for row in transactions_loaded.allTransactions.results
+    ]
 
     # assert how many records
-    assert len(loaded_data) == 89
+    assert len(rows) == 89
     # assert one of the records has right stuff.
-    assert loaded_data[0].account == "exampleAccount"
-    assert loaded_data[0].group == "Personal"
+    assert rows[0][TRANSACTIONS_HEADER.index("account")] == "exampleAccount"
+    assert rows[0][TRANSACTIONS_HEADER.index("group")] == "Personal"
 
     return
 
 
-def test_unmarshall_single_holdingsquery(holdings_data):
-    schema = HoldingsQuerySchema()
-    loaded_data = schema.load(holdings_data)
+def test_unmarshall_single_holdingsquery(holdings_loaded):
+    loaded_data = holdings_loaded
 
     assert len(loaded_data) == 2
     # account field will be null. is written by a parent before being fed to csv.
@@ -147,55 +269,92 @@ def test_unmarshall_single_holdingsquery(holdings_data):
 
 
 @pytest.mark.asyncio
-# tell m fixture to pre-create a session file
-@pytest.mark.parametrize("m", [True], indirect=True)
-async def test_get_transactions_401_single_retry(
+# tell m fixture to pre-create a session file. the three API methods share the
+# retry plumbing under test (stale session -> 401 -> re-login -> retried call),
+# so they are one test with per-method result checks rather than three copies
+# of the same fixture stack and mock sequence.
+@pytest.mark.parametrize(
+    "m,method,args,data_name",
+    [
+        (True, "get_transactions", (), "transactions"),
+        (True, "get_accounts", (), "accounts"),
+        (True, "get_holdings", ("test_id",), "holdings"),
+    ],
+    indirect=["m"],
+)
+async def test_get_data_401_single_retry(
     httpserver: pytest_httpserver.HTTPServer,
     local_url,
-    mocker,
-    transaction_data,
     request,
-    test_out,
+    json_data,
+    gql_body,
     m,
+    method,
+    args,
+    data_name,
 ):
 
     # instantiate our monarch api, give it a stale session file.
     # it will read the session we know is stale, and not attempt to login directly yet.
-    # ask it to get transactions; it will hit our mocked server. respond with a 401 as the real server would
-    # verify our api responds by re-logging-in, then retrying the get-transactions
-    # on the second attempt to get transactions, return data and conclude.
+    # ask it to get data; it will hit our mocked server. respond with a 401 as the real server would
+    # verify our api responds by re-logging-in, then retrying the get
+    # on the second attempt to get data, return data and conclude.
 
     assert httpserver.is_running()
 
+    # get_transactions fires one request per month window concurrently, so an
+    # ordered response list no longer matches arrival order. hand the first
+    # GQL request a 401 via a oneshot matcher and answer everything after that
+    # (including the whole retried batch) with canned data.
     # warning - these URLs are sensitive to a trailing slash.
-    httpserver.expect_ordered_request(MM_GRAPHQL_URL).respond_with_data(
+    httpserver.expect_oneshot_request(MM_GRAPHQL_URL).respond_with_data(
         "KDD ERROR", status=401, content_type="text/plain"
     )
-    httpserver.expect_ordered_request(MM_AUTH_URL).respond_with_json(
-        {"token": "FAKETOKEN"}, status=200
+    httpserver.expect_request(MM_AUTH_URL).respond_with_data(
+        AUTH_RESP, content_type="application/json"
     )
-    # finally, return some actual transaction data using our data samples
-
-    httpserver.expect_ordered_request(MM_GRAPHQL_URL).respond_with_json(
-        {"data": transaction_data}, status=200
+    # return some actual data using our data samples
+    httpserver.expect_request(MM_GRAPHQL_URL).respond_with_data(
+        gql_body(data_name), content_type="application/json"
     )
 
-    login_spy = mocker.spy(m, "login")
+    # hydrate the stale saved session synchronously instead of a throwaway
+    # await m.login(); the count below then covers exactly the retry path.
+    assert m._load_session_if_any()
 
-    # load the saved session
-    # but want not to invoke this until after we've had a chance to spy
-    await m.login()
+    m.login = count_calls(m.login)
+    if method == "get_holdings":
+        # keep a handle on the wrapper: the re-login on 401 swaps in a fresh
+        # monarchmoney instance, so m.mm.get_account_holdings won't be ours after.
+        holdings_calls = m.mm.get_account_holdings = count_calls(
+            m.mm.get_account_holdings
+        )
 
-    # should raise 401 right now, until we get our retry logic
-    # now we need to try to add some tenacity behavior and assert they were called.
-    txs = await m.get_transactions()
+    # try to get data; receive 401. re-login and retry getting data, receive 200 and data.
+    result = await getattr(m, method)(*args)
 
-    # method will retry; this should fail as being called twice
-    assert login_spy.call_count == 2
-    print(login_spy.call_args_list)
+    # only the 401-triggered re-login goes through login()
+    assert m.login.count == 1
 
-    # assert something about the data returned
-    assert txs["allTransactions"]["totalCount"] == 89
+    if method == "get_transactions":
+        # the mock serves the same 89 transactions for every month window, so
+        # expect one copy per window.
+        windows = month_windows(
+            datetime.date(datetime.date.today().year, 1, 1), datetime.date.today()
+        )
+        assert result["allTransactions"]["totalCount"] == 89 * len(windows)
+    elif method == "get_accounts":
+        assert len(load_accounts(result)) == 23
+    else:
+        holdings_query = request.getfixturevalue("hqs").load(result)
+        assert len(holdings_query) == 2
+        # account name not available from within the above query.
+        assert holdings_query[0].ticker == "AAA"
+        assert holdings_query[0].shares == "1288.212"
+        assert holdings_query[0].price == "33.03"
+        assert holdings_query[0].cost == "2227.6"
+        assert holdings_calls.last_args == args
+        assert holdings_calls.count == 1
 
 
 @pytest.mark.asyncio
@@ -205,8 +364,7 @@ async def test_report_transactions_success(
     httpserver: pytest_httpserver.HTTPServer,
     local_url,
     mocker,
-    category_data,
-    transaction_data,
+    gql_body,
     request,
     m,
 ):
@@ -214,31 +372,39 @@ async def test_report_transactions_success(
     assert httpserver.is_running()
 
     # pretend for this test that the use of a pickled session worked and we don't need to fire a login call to the server.
-    # return some actual transaction data using our data samples
-    httpserver.expect_ordered_request(MM_GRAPHQL_URL).respond_with_json(
-        {"data": category_data}, status=200
-    )
-    httpserver.expect_ordered_request(MM_GRAPHQL_URL).respond_with_json(
-        {"data": transaction_data}, status=200
+    # the month-windowed transactions fetch asks more than once, so dispatch
+    # canned data by GQL operation instead of an ordered response list. the
+    # bodies are pre-encoded bytes, so each request costs no serialization.
+    gql_responses = {
+        "GetCategories": gql_body("categories"),
+        "GetTransactionsList": gql_body("transactions"),
+    }
+
+    def graphql_by_operation(req):
+        return werkzeug.Response(
+            gql_responses[req.json["operationName"]],
+            status=200,
+            content_type="application/json",
+        )
+
+    httpserver.expect_request(MM_GRAPHQL_URL).respond_with_handler(
+        graphql_by_operation
     )
 
     await m.report_transactions()
 
-    # check the existence of the file
-    with open(m.fn_tx_report, "r") as f:
-        csv_reader = csv.reader(f)
-        header = next(csv_reader)
-        # spot check just a couple things for now.
-        assert header == TRANSACTIONS_HEADER
-        first_row = next(csv_reader)
-        assert "Clothing" in first_row
-        pass
+    # check the existence of the file. outputs here are ~dozens of rows, so
+    # read each one in a single pass instead of through a buffered file object.
+    csv_reader = csv.reader(pathlib.Path(m.fn_tx_report).read_text().splitlines())
+    header = next(csv_reader)
+    # spot check just a couple things for now.
+    assert header == TRANSACTIONS_HEADER
+    first_row = next(csv_reader)
+    assert "Clothing" in first_row
 
 
-def test_unmarshall_accounts(accounts_data):
-    schema = AccountsQuerySchema()
-    # still a schema loaded dict not an object. consider fixing naming convention to *Schema so I can post-load another object
-    loaded_data = schema.load(accounts_data)
+def test_unmarshall_accounts(accounts_loaded):
+    loaded_data = accounts_loaded
     assert len(loaded_data) == 23
     assert loaded_data[0].account == "Checking"
     assert str(loaded_data[0].balance) == "1811.71"
@@ -254,7 +420,7 @@ async def test_report_balances_success(
     httpserver: pytest_httpserver.HTTPServer,
     local_url,
     mocker,
-    accounts_data,
+    gql_body,
     request,
     m,
 ):
@@ -262,159 +428,57 @@ async def test_report_balances_success(
     assert httpserver.is_running()
 
     # pretend for this test that the use of a pickled session worked and we don't need to fire a login call to the server.
-    # return some actual transaction data using our data samples
-    httpserver.expect_ordered_request(MM_GRAPHQL_URL).respond_with_json(
-        {"data": accounts_data}, status=200
-    )
-    # we're running twice to test appending of balance history
-    httpserver.expect_ordered_request(MM_GRAPHQL_URL).respond_with_json(
-        {"data": accounts_data}, status=200
-    )
+    # return some actual account data using our data samples.
+    # we're running twice to test appending of balance history.
+    cycle_responses(httpserver, MM_GRAPHQL_URL, [gql_body("accounts")] * 2)
 
     account_data = await m.report_balances()
-    checking_row = [
-        "Checking",
-        "1811.71",
-        "2026-01-12",
-        "2026-01-12T14:28:13.637497+00:00",
-    ]
 
     assert len(account_data) == 23
 
-    # check the existence of the file
-    with open(m.fn_balance_report, "r") as f:
-        csv_reader = csv.reader(f)
-        header = next(csv_reader)
-        # spot check just a couple things for now.
-        assert header == BALANCES_HEADER
-
-        first_row = next(csv_reader)
-        print(first_row)
-        assert first_row == checking_row
+    # check the existence of the file. these outputs are ~50 rows at most, so
+    # read each one in a single pass instead of through a buffered file object.
+    csv_reader = csv.reader(
+        pathlib.Path(m.fn_balance_report).read_text().splitlines()
+    )
+    header = next(csv_reader)
+    # spot check just a couple things for now.
+    assert header == BALANCES_HEADER
 
-        pass
+    first_row = next(csv_reader)
+    assert tuple(first_row) == CHECKING_ROW
 
     # check the existence of the history file
-    with open(m.fn_balance_history_report, "r") as f:
-        csv_reader = csv.reader(f)
-        data = list(csv_reader)
-        # one copy of the file
-        assert len(data) == 24
-        assert data[0] == BALANCES_HEADER
-        assert data[1] == checking_row
+    csv_reader = csv.reader(
+        pathlib.Path(m.fn_balance_history_report).read_text().splitlines()
+    )
+    # spot-check the leading rows, then count the rest off the stream
+    # instead of materializing every row as a list[str].
+    head = list(itertools.islice(csv_reader, 2))
+    assert head[0] == BALANCES_HEADER
+    assert tuple(head[1]) == CHECKING_ROW
+    # one copy of the file
+    assert len(head) + sum(1 for _ in csv_reader) == 24
 
     # write again
     await m.report_balances()
     # prove balances overwritten and history appended but without dup header.
-    with open(m.fn_balance_report, "r") as f:
-        csv_reader = csv.reader(f)
-        data = list(csv_reader)
-        assert len(data) == 24
-
-    # check the existence of the history file
-    with open(m.fn_balance_history_report, "r") as f:
-        csv_reader = csv.reader(f)
-        data = list(csv_reader)
-        # two sets of account data plus one header
-        assert len(data) == 47
-        assert data[0] == BALANCES_HEADER
-        assert data[1] == checking_row
-        # would be header again except we detected non-empty file and went ahead to next data row.
-        assert data[24] == checking_row
-
-
-@pytest.mark.asyncio
-# tell m fixture to pre-create a session file
-@pytest.mark.parametrize("m", [True], indirect=True)
-async def test_get_accounts_401(
-    httpserver: pytest_httpserver.HTTPServer, local_url, mocker, accounts_data, m
-):
-
-    # instantiate our monarch api, give it a stale session file.
-    # it will read the session we know is stale, and not attempt to login directly yet.
-    # ask it to get accounts; it will hit our mocked server. respond with a 401 as the real server would
-    # verify our api responds by re-logging-in, then retrying the get-transactions
-    # on the second attempt to get accounts, return data and conclude.
-
-    assert httpserver.is_running()
-
-    # warning - these URLs are sensitive to a trailing slash.
-    httpserver.expect_ordered_request(MM_GRAPHQL_URL).respond_with_data(
-        "KDD ERROR", status=401, content_type="text/plain"
-    )
-    httpserver.expect_ordered_request(MM_AUTH_URL).respond_with_json(
-        {"token": "FAKETOKEN"}, status=200
-    )
-
-    # finally, return some actual transaction data using our data samples
-
-    httpserver.expect_ordered_request(MM_GRAPHQL_URL).respond_with_json(
-        {"data": accounts_data}, status=200
-    )
-
-    login_spy = mocker.spy(m, "login")
-
-    # load the saved session. won't make any http calls.
-    await m.login()
-
-    # try to get data; receive 401. retry getting data, receive 200 and data.
-    accounts = await m.get_accounts()
-    acs = AccountsQuerySchema()
-    accounts_query = acs.load(accounts)
-
-    assert login_spy.call_count == 2
-    assert len(accounts_query) == 23
-    return
-
-
-@pytest.mark.asyncio
-# tell m fixture to pre-create a session file
-@pytest.mark.parametrize("m", [True], indirect=True)
-async def test_get_holdings_401(
-    httpserver: pytest_httpserver.HTTPServer,
-    local_url,
-    mocker,
-    holdings_data,
-    m,
-):
-    assert httpserver.is_running()
-
-    # warning - these URLs are sensitive to a trailing slash.
-    httpserver.expect_ordered_request(MM_GRAPHQL_URL).respond_with_data(
-        "KDD ERROR", status=401, content_type="text/plain"
+    csv_reader = csv.reader(
+        pathlib.Path(m.fn_balance_report).read_text().splitlines()
     )
-    httpserver.expect_ordered_request(MM_AUTH_URL).respond_with_json(
-        {"token": "FAKETOKEN"}, status=200
-    )
-
-    # finally, return some actual transaction data using our data samples
+    assert sum(1 for _ in csv_reader) == 24
 
-    httpserver.expect_ordered_request(MM_GRAPHQL_URL).respond_with_json(
-        {"data": holdings_data}, status=200
+    # check the existence of the history file
+    csv_reader = csv.reader(
+        pathlib.Path(m.fn_balance_history_report).read_text().splitlines()
     )
-
-    login_spy = mocker.spy(m, "login")
-    mm_get_account_holdings_spy = mocker.spy(m.mm, "get_account_holdings")
-
-    # load the saved session. won't make any http calls.
-    await m.login()
-
-    # try to get data; receive 401. retry getting data, receive 200 and data.
-    test_id = "test_id"
-    holdings = await m.get_holdings(test_id)
-    hqs = HoldingsQuerySchema()
-    holdings_query = hqs.load(holdings)
-
-    assert login_spy.call_count == 2
-    assert len(holdings_query) == 2
-    # account name not available from within the above query.
-    assert holdings_query[0].ticker == "AAA"
-    assert holdings_query[0].shares == "1288.212"
-    assert holdings_query[0].price == "33.03"
-    assert holdings_query[0].cost == "2227.6"
-    mm_get_account_holdings_spy.assert_called_with(test_id)
-    mm_get_account_holdings_spy.call_count == 1
-    return
+    head = list(itertools.islice(csv_reader, 25))
+    assert head[0] == BALANCES_HEADER
+    assert tuple(head[1]) == CHECKING_ROW
+    # would be header again except we detected non-empty file and went ahead to next data row.
+    assert tuple(head[24]) == CHECKING_ROW
+    # two sets of account data plus one header
+    assert len(head) + sum(1 for _ in csv_reader) == 47
 
 
 @pytest.mark.asyncio
@@ -424,37 +488,45 @@ async def test_report_portfolio_success(
     httpserver: pytest_httpserver.HTTPServer,
     local_url,
     mocker,
-    accounts_data,
-    holdings_data,
+    accounts_loaded,
+    json_data,
     request,
     m,
 ):
 
     assert httpserver.is_running()
 
-    # 6 calls try to get holdings of various accounts; collect the IDs we query and check them.
-    # for each return some canned info.
-    for i in range(1, 7):
-        httpserver.expect_ordered_request(MM_GRAPHQL_URL).respond_with_json(
-            {"data": holdings_data}, status=200
-        )
+    accounts_query = accounts_loaded
+
+    # holdings for every account now arrive in one aliased batch response;
+    # give each account with holdings the same canned portfolio.
+    with_holdings = [a for a in accounts_query if int(a.holdingsCount) > 0]
+    batch_data = {
+        "gatsby%d_portfolio" % i: json_data("holdings")["portfolio"]
+        for i in range(len(with_holdings))
+    }
+    # serialize the canned body ourselves, once; respond_with_json would
+    # re-run json.dumps inside the response handler.
+    httpserver.expect_ordered_request(MM_GRAPHQL_URL).respond_with_data(
+        orjson.dumps({"data": batch_data}), content_type="application/json"
+    )
 
-    schema = AccountsQuerySchema()
-    await m.report_portfolio(schema.load(accounts_data))
+    await m.report_portfolio(accounts_query)
 
     # check the existence of the file
 
-    with open(m.fn_portfolio_report, "r") as f:
-        csv_reader = csv.DictReader(f)
+    csv_reader = csv.DictReader(
+        pathlib.Path(m.fn_portfolio_report).read_text().splitlines()
+    )
 
-        # spot check just a couple things for now.
-        assert csv_reader.fieldnames == PORTFOLIO_HEADER
+    # spot check just a couple things for now.
+    assert csv_reader.fieldnames == PORTFOLIO_HEADER
 
-        count = 0
-        for row in csv_reader:
-            count = count + 1
-            # weak and sloppy contents check
-            assert row["ticker"] == "AAA" or row["ticker"] == "BBB"
+    count = 0
+    for row in csv_reader:
+        count = count + 1
+        # weak and sloppy contents check
+        assert row["ticker"] == "AAA" or row["ticker"] == "BBB"
 
     return
 
@@ -514,44 +586,52 @@ async def test_main(
     local_url,
     mocker,
     request,
-    accounts_data,
-    category_data,
-    transaction_data,
-    holdings_data,
+    json_data,
+    gql_body,
     test_out,
 ):
 
-    # white box test must know the order of calls within in order to mock the http responses in order. fragile.
-    # could use a spy to wrap calls with data prep but that's not really any better.
+    # main() now fires the balances and transactions reports concurrently, so the
+    # arrival order of the GQL calls is no longer deterministic. dispatch on the
+    # GQL operation name instead of mocking an ordered response list.
 
     # login-on-401 behavior tested elsewhere
 
     # login call will look for a pickled session. this test provides one that shall not exist pre-test,
     # ensuring that a login will be called.
-    httpserver.expect_ordered_request(MM_AUTH_URL).respond_with_json(
-        {"token": "FAKETOKEN"}, status=200
+    httpserver.expect_request(MM_AUTH_URL).respond_with_data(
+        AUTH_RESP, content_type="application/json"
     )
 
-    # balances calls first
-    httpserver.expect_ordered_request(MM_GRAPHQL_URL).respond_with_json(
-        {"data": accounts_data}, status=200
-    )
-    # categories next
-    httpserver.expect_ordered_request(MM_GRAPHQL_URL).respond_with_json(
-        {"data": category_data}, status=200
-    )
+    # pre-encoded bytes per operation; only the holdings batch, whose alias
+    # count depends on the request, is serialized per call.
+    gql_responses = {
+        "GetAccounts": gql_body("accounts"),
+        "GetCategories": gql_body("categories"),
+        "GetTransactionsList": gql_body("transactions"),
+    }
+
+    def graphql_by_operation(req):
+        op = req.json["operationName"]
+        if op == "Web_GetHoldingsBatch":
+            # one aliased selection per requested account; same canned portfolio for each.
+            data = {
+                "gatsby%d_portfolio" % i: json_data("holdings")["portfolio"]
+                for i in range(len(req.json["variables"]))
+            }
+            body = orjson.dumps({"data": data})
+        else:
+            body = gql_responses[op]
+        return werkzeug.Response(
+            body,
+            status=200,
+            content_type="application/json",
+        )
 
-    # transactions next
-    httpserver.expect_ordered_request(MM_GRAPHQL_URL).respond_with_json(
-        {"data": transaction_data}, status=200
+    httpserver.expect_request(MM_GRAPHQL_URL).respond_with_handler(
+        graphql_by_operation
     )
 
-    # then holdings exactly 6 times. I can't find such a expectation in pytest_httpserver so just dup the expectation here.
-    for i in range(1, 7):
-        httpserver.expect_ordered_request(MM_GRAPHQL_URL).respond_with_json(
-            {"data": holdings_data}, status=200
-        )
-
     out_b = test_out + "/" + request.node.name + "_balances.csv"
     out_h = test_out + "/" + request.node.name + "_balances_history.csv"    
     out_t = test_out + "/" + request.node.name + "_transactions.csv"